@@ -1,18 +1,16 @@
 import os
 from typing import Dict, List, Optional
 import re
-import json
+from bisect import bisect_left
 from collections import defaultdict
+from contextlib import nullcontext
 import pickle
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
-import warnings
 import math
 import nltk
 from nltk.stem.porter import PorterStemmer
 
 
 stemmer = PorterStemmer()
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
 
 class Posting:
@@ -27,13 +25,126 @@ class Posting:
         return f"Posting(doc_id={self.doc_id}, tf={self.term_freq}, imp={self.importance}, tf_idf={self.tf_idf:.2f})"
 
 
+POSITIONS_SKIP = 64  # docs per skip-table entry in a positions.dat block
+
+
+def write_varint(out: bytearray, value: int):
+    # 7 bits per byte, low bits first, high bit = more bytes follow
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(buf, i: int, end: int):
+    # returns (value, index after it); never reads at or past end
+    value = shift = 0
+    while True:
+        if i >= end:
+            raise ValueError("positions block overruns its lexicon length; positions.dat is stale or corrupt")
+        byte = buf[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, i
+        shift += 7
+
+
+def encode_positions(positions: List[int]) -> bytes:
+    # delta-encode ascending positions, then varint each gap
+    out = bytearray()
+    prev = 0
+    for pos in positions:
+        write_varint(out, pos - prev)
+        prev = pos
+    return bytes(out)
+
+
+def decode_positions(data: bytes) -> List[int]:
+    positions = []
+    pos = gap = shift = 0
+    for byte in data:
+        gap |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            pos += gap
+            positions.append(pos)
+            gap = shift = 0
+    return positions
+
+
+def pack_term_positions(data: bytes, num_docs: int) -> bytes:
+    # one term's block in positions.dat, all varints: [num_docs][num_skips][skips...][data]
+    # data holds one (doc_id gap, length, encoded positions) entry per doc in ascending doc_id order,
+    # with the first gap taken from -1 (built up by add_document). skip k, for k >= 1, is
+    # (last doc_id before entry k * POSITIONS_SKIP, byte offset of that entry), both delta-encoded,
+    # so a reader decodes at most POSITIONS_SKIP entries to find a doc
+    skips = bytearray()
+    num_skips = 0
+    doc_id = prev_base = -1
+    prev_offset = i = 0
+    for n in range(num_docs):
+        if n and n % POSITIONS_SKIP == 0:
+            write_varint(skips, doc_id - prev_base)
+            write_varint(skips, i - prev_offset)
+            prev_base, prev_offset = doc_id, i
+            num_skips += 1
+        gap, i = read_varint(data, i, len(data))
+        length, i = read_varint(data, i, len(data))
+        doc_id += gap
+        i += length
+
+    header = bytearray()
+    write_varint(header, num_docs)
+    write_varint(header, num_skips)
+    return bytes(header + skips) + bytes(data)
+
+
+def read_term_positions(buf, offset: int, length: int, doc_ids) -> Dict[int, List[int]]:
+    # decode only the requested docs from a pack_term_positions block at buf[offset:offset + length]
+    end = offset + length
+    num_docs, i = read_varint(buf, offset, end)
+    num_skips, i = read_varint(buf, i, end)
+    bases, offsets = [-1], [0]
+    for _ in range(num_skips):
+        base_gap, i = read_varint(buf, i, end)
+        offset_gap, i = read_varint(buf, i, end)
+        bases.append(bases[-1] + base_gap)
+        offsets.append(offsets[-1] + offset_gap)
+    data_start = i
+
+    positions = {}
+    group = -1
+    doc_id = left = j = 0
+    for target in sorted(doc_ids):
+        g = bisect_left(bases, target) - 1  # last group whose base is below target
+        if g != group:
+            group, doc_id, j = g, bases[g], data_start + offsets[g]
+            left = min(POSITIONS_SKIP, num_docs - g * POSITIONS_SKIP)
+        while left:
+            gap, k = read_varint(buf, j, end)
+            pos_length, k = read_varint(buf, k, end)
+            if doc_id + gap > target:
+                break  # target isn't in this term's block; leave the entry for the next target
+            doc_id, left, j = doc_id + gap, left - 1, k + pos_length
+            if j > end:
+                raise ValueError("positions block overruns its lexicon length; positions.dat is stale or corrupt")
+            if doc_id == target:
+                positions[doc_id] = decode_positions(buf[k:j])
+                break
+    return positions
+
+
 class InvertedIndex:
-    def __init__(self):
+    def __init__(self, positional: bool = False):
         self.index: Dict[str, List[Posting]] = defaultdict(list)
         self.doc_id_map: Dict[int, str] = {}
         self.doc_id_counter: int = 0
         self.default_importance: int = 5  # normal text
         self.doc_freq: Dict[str, int] = defaultdict(int)  # Document frequency for each token, for tf-idf calculations
+        self.positional = positional  # also record token positions, written to a separate positions file
+        self.positions: Dict[str, bytearray] = defaultdict(bytearray)  # token -> positions.dat data section
 
     def stem(self, word: str) -> str:
         return stemmer.stem(word)
@@ -88,18 +199,18 @@ class InvertedIndex:
         if importance_map is None:
             importance_map = {}
 
-        for bold_tag in soup.find_all(["b", "strong"]):
-            bold_text = bold_tag.get_text(separator=" ", strip=True)
-            for tok in self.tokenize(bold_text):
-                if importance_map.get(tok, 99) > 4:
-                    importance_map[tok] = 4
-
         # Tokenize content and count term frequencies
         tokens = self.tokenize(content)
         term_counts = defaultdict(int)
         for token in tokens:
             term_counts[token] += 1
 
+        # Record token positions when building a positional index
+        token_positions = defaultdict(list)
+        if self.positional:
+            for pos, token in enumerate(tokens):
+                token_positions[token].append(pos)
+
         # Track document frequency for each token
         unique_tokens = set(tokens)
         for token in unique_tokens:
@@ -108,90 +219,72 @@ class InvertedIndex:
         # Add tokens to the index
         for token, freq in term_counts.items():
             imp = importance_map.get(token, self.default_importance)
-            self.index[token].append(Posting(doc_id, freq, imp))
+            postings = self.index[token]
+            if self.positional:
+                # append this doc's (doc_id gap, length, positions) entry, in pack_term_positions' layout
+                prev_doc_id = postings[-1].doc_id if postings else -1
+                encoded = encode_positions(token_positions[token])
+                entry = self.positions[token]
+                write_varint(entry, doc_id - prev_doc_id)
+                write_varint(entry, len(encoded))
+                entry += encoded
+            postings.append(Posting(doc_id, freq, imp))
 
 
 
 
 
-    def compute_tf_idf(self):
+    def finalize_postings(self, token: str, postings: List[Posting]):
+        # fill in tf-idf and sort by (importance, -tf_idf), the order the ranker reads postings in
         num_docs = len(self.doc_id_map)
-        for token, postings in self.index.items():
-            idf = math.log(num_docs / (1 + self.doc_freq[token]))  # 1 so we dont divide by zero
-            for posting in postings:
-                tf = posting.term_freq
-                posting.tf_idf = tf * idf  # Add tf_idf attribute to Posting class
-
-    def sort_postings(self):
-        for token, postings in self.index.items():
-            postings.sort(key=lambda p: (p.importance, -p.tf_idf))
-
-    def print_index(self):
-        for token, postings in self.index.items():
-            print(f"{token}: {postings}")
-
-    def show_index_stats(self, index_file_path: str):
+        idf = math.log(num_docs / (1 + self.doc_freq[token]))  # 1 so we dont divide by zero
+        for posting in postings:
+            posting.tf_idf = posting.term_freq * idf
+        postings.sort(key=lambda p: (p.importance, -p.tf_idf))
+
+    def write_index(self, lexicon_path: str = "lexicon.pkl", postings_path: str = "postings.dat",
+                    positions_path: str = "positions.dat"):
+        # stream each term straight into postings.dat + lexicon.pkl in a single pass:
+        # tf-idf and sorting are finalized per term and the in-memory list is dropped once written.
+        # this consumes self.index (and self.positions): both are empty afterwards, so read the
+        # written files back through query.load_lexicon / fetch_postings (see test.py)
+        # positional index: lexicon entries become (offset, length, pos_offset, pos_length) into positions.dat
+        lexicon: Dict[str, tuple] = {}
+        num_postings = 0
+
+        with open(postings_path, "wb") as pf, \
+                (open(positions_path, "wb") if self.positional else nullcontext()) as posf:
+            for token in list(self.index.keys()):
+                postings = self.index.pop(token)
+                self.finalize_postings(token, postings)
+
+                offset = pf.tell()
+                data = pickle.dumps(postings)
+                pf.write(data)
+                lexicon[token] = (offset, len(data))
+                num_postings += len(postings)
+
+                if self.positional:
+                    pos_offset = posf.tell()
+                    pos_data = pack_term_positions(self.positions.pop(token), len(postings))
+                    posf.write(pos_data)
+                    lexicon[token] += (pos_offset, len(pos_data))
+
+        with open(lexicon_path, "wb") as lf:
+            pickle.dump((lexicon, self.doc_id_map), lf)
+
+        index_files = [lexicon_path, postings_path] + ([positions_path] if self.positional else [])
+        self.show_index_stats(len(lexicon), num_postings, index_files)
+        return lexicon
+
+    def show_index_stats(self, num_tokens: int, num_postings: int, index_files: List[str]):
         num_docs = len(self.doc_id_map)
-        num_tokens = len(self.index)
-
-        with open(index_file_path, "wb") as f:
-            pickle.dump((self.index, self.doc_id_map), f)
-
-        size_kb = os.path.getsize(index_file_path) / 1024
+        size_kb = sum(os.path.getsize(path) for path in index_files) / 1024
         print(f"Number of documents indexed: {num_docs}")
         print(f"Number of unique tokens: {num_tokens}")
+        print(f"Number of postings: {num_postings}")
         print(f"Size of index on disk: {size_kb:.2f} KB")
 
 
 if __name__ == "__main__":
-    index = InvertedIndex()
-    root_dir = "/Users/jiananhong/Desktop/cs121"
-
-    for dirpath, dirnames, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename.endswith(".json"):
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        raw_content = data.get("content", "")
-                        url = data.get("url", filepath)
-
-                        # parse HTML/XML
-                        if raw_content.strip().startswith("<?xml") or "BEGIN:VCALENDAR" in raw_content:
-                            soup = BeautifulSoup(raw_content, "xml")
-                        else:
-                            soup = BeautifulSoup(raw_content, "html.parser")
-
-                        clean_text = soup.get_text(separator=" ", strip=True)
-
-                        # build importance map from headings
-                        importance_map: Dict[str, int] = {}
-                        for level in [1, 2, 3]:
-                            for tag in soup.find_all(f"h{level}"):
-                                heading_text = tag.get_text(separator=" ", strip=True)
-                                for token in index.tokenize(heading_text):
-                                    importance_map[token] = min(importance_map.get(token, index.default_importance),
-                                                                level)
-
-                        # skip short content
-                        if len(clean_text.strip()) < 20:
-                            print(f"Skipping {url} — content too short or invalid.")
-                            continue
-
-                        index.add_document(clean_text, url, importance_map)
-
-                except Exception as e:
-                    print(f"Error processing {filepath}: {e}")
-
-    # Compute TF-IDF
-    index.compute_tf_idf()
-
-    # Sort postings before saving or printing
-    index.sort_postings()
-
-    # Print the index to verify TF-IDF scores
-    # index.print_index()
-
-    # index.print_index()
-    index.show_index_stats("index.pkl")
+    raise SystemExit("A3_index is a library now; build the index with: python build_index.py [--positional]")
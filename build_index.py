@@ -0,0 +1,69 @@
+# Entry point for building the index: python build_index.py [--positional]
+# writes lexicon.pkl + postings.dat (+ positions.dat) in the working directory
+import os
+import sys
+import json
+import warnings
+from typing import Dict
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+from A3_index import InvertedIndex
+
+
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+
+def main():
+    # pass --positional to also write positions.dat for phrase and proximity queries
+    index = InvertedIndex(positional="--positional" in sys.argv)
+    root_dir = "/Users/jiananhong/Desktop/cs121"
+
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        for filename in filenames:
+            if filename.endswith(".json"):
+                filepath = os.path.join(dirpath, filename)
+                try:
+                    with open(filepath, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                        raw_content = data.get("content", "")
+                        url = data.get("url", filepath)
+
+                        # parse HTML/XML
+                        if raw_content.strip().startswith("<?xml") or "BEGIN:VCALENDAR" in raw_content:
+                            soup = BeautifulSoup(raw_content, "xml")
+                        else:
+                            soup = BeautifulSoup(raw_content, "html.parser")
+
+                        clean_text = soup.get_text(separator=" ", strip=True)
+
+                        # build importance map from headings
+                        importance_map: Dict[str, int] = {}
+                        for level in [1, 2, 3]:
+                            for tag in soup.find_all(f"h{level}"):
+                                heading_text = tag.get_text(separator=" ", strip=True)
+                                for token in index.tokenize(heading_text):
+                                    importance_map[token] = min(importance_map.get(token, index.default_importance),
+                                                                level)
+
+                        # bold text ranks just below h3
+                        for bold_tag in soup.find_all(["b", "strong"]):
+                            bold_text = bold_tag.get_text(separator=" ", strip=True)
+                            for tok in index.tokenize(bold_text):
+                                if importance_map.get(tok, 99) > 4:
+                                    importance_map[tok] = 4
+
+                        # skip short content
+                        if len(clean_text.strip()) < 20:
+                            print(f"Skipping {url} — content too short or invalid.")
+                            continue
+
+                        index.add_document(clean_text, url, importance_map)
+
+                except Exception as e:
+                    print(f"Error processing {filepath}: {e}")
+
+    # Compute TF-IDF, sort and write lexicon.pkl + postings.dat (+ positions.dat) term by term
+    index.write_index("lexicon.pkl", "postings.dat", "positions.dat")
+
+
+if __name__ == "__main__":
+    main()
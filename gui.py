@@ -1,12 +1,28 @@
 import http.server
 import socketserver
+import socket
 import urllib.parse
 import html
 import time
-from query import load_lexicon, simple_search
+import os
+import sys
+import gc
+import signal
+import traceback
+from query import load_lexicon, simple_search, map_index_file
 
+
+def index_source(path: str):
+    # mmap can't map a missing or empty file; those are read by path instead
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return map_index_file(path)
+    return path
+
+
+# loaded / mapped once in the parent; pre-forked workers share these pages read-only
 lexicon, doc_id_map = load_lexicon('lexicon.pkl')
-postings_path = 'postings.dat'
+postings_src = index_source('postings.dat')
+positions_src = index_source('positions.dat')
 PORT = 8000
 
 class SearchHandler(http.server.SimpleHTTPRequestHandler):
@@ -99,7 +115,8 @@ class SearchHandler(http.server.SimpleHTTPRequestHandler):
 
             # Measure search time
             start = time.time()
-            results = simple_search(query, lexicon, doc_id_map, postings_path, top_k=5)
+            results = simple_search(query, lexicon, doc_id_map, postings_src, top_k=5,
+                                    positions_path=positions_src)
             elapsed = (time.time() - start) * 1000  # in milliseconds
             print(f"[SEARCH] query='{query}' took {elapsed:.1f} ms")
 
@@ -238,7 +255,89 @@ class SearchHandler(http.server.SimpleHTTPRequestHandler):
         else:
             self.send_error(404)
 
+class ReusePortTCPServer(socketserver.TCPServer):
+    # every worker binds its own listener on PORT; the kernel spreads connections across them
+    allow_reuse_address = True
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def spawn_worker() -> int:
+    # bind in the parent so a taken port or a failed setsockopt is raised here, not lost in a child
+    httpd = ReusePortTCPServer(("", PORT), SearchHandler)
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            with httpd:
+                httpd.serve_forever()
+        except BaseException:
+            traceback.print_exc()
+            os._exit(1)
+        os._exit(0)
+    httpd.server_close()
+    return pid
+
+
+def serve_prefork(num_workers: int) -> int:
+    # move everything loaded so far out of the GC's reach, so collections in the
+    # workers don't write to (and copy) the shared lexicon / doc map pages
+    gc.freeze()
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # a plain kill of the parent takes the workers down with it
+    signal.signal(signal.SIGTERM, stop)
+    workers = set()
+    exit_code = 0
+    try:
+        for _ in range(num_workers):
+            workers.add(spawn_worker())
+        print(f"Serving at http://localhost:{PORT} with {num_workers} workers")
+
+        while True:
+            pid, status = os.wait()
+            workers.discard(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if code >= 0:
+                # the worker raised (its traceback is already printed); restarting would likely do the same
+                print(f"Worker {pid} exited with status {code}, shutting down", file=sys.stderr)
+                exit_code = 1
+                break
+            # killed by a signal (OOM killer, kill -9): replace it
+            print(f"Worker {pid} killed by signal {-code}, respawning", file=sys.stderr)
+            workers.add(spawn_worker())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in workers:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+    return exit_code
+
+
 if __name__ == "__main__":
+    # python gui.py --workers N  (pre-fork mode, needs fork + SO_REUSEPORT)
+    if "--workers" in sys.argv:
+        arg = sys.argv.index("--workers") + 1
+        num_workers = sys.argv[arg] if arg < len(sys.argv) else ""
+        if not num_workers.isdigit() or int(num_workers) < 1:
+            sys.exit(f"--workers needs a whole number >= 1, got '{num_workers}'")
+        if hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT"):
+            sys.exit(serve_prefork(int(num_workers)))
+        print("--workers needs fork and SO_REUSEPORT, which this platform lacks; serving in a single process")
+
     with socketserver.TCPServer(("", PORT), SearchHandler) as httpd:
         print(f"Serving at http://localhost:{PORT}")
         httpd.serve_forever()
@@ -4,6 +4,8 @@ from A3_index import InvertedIndex, Posting
 def build_secondary_index(index_path='index.pkl',
                           lexicon_path='lexicon.pkl',
                           postings_path='postings.dat'):
+    # only needed to convert an old index.pkl; A3_index now writes
+    # lexicon.pkl + postings.dat directly via InvertedIndex.write_index
 
     # lexicon.pkl include dict { term: (offset, length) } and doc_id_map
     # postings.dat all postings
@@ -25,4 +27,7 @@ def build_secondary_index(index_path='index.pkl',
         pickle.dump((lexicon, doc_id_map), lf)
 
 if __name__ == '__main__':
+    # legacy converter: turns an index.pkl from older builds into lexicon.pkl + postings.dat.
+    # new indexes are written directly by build_index.py
+    print("Converting legacy index.pkl; for new indexes run: python build_index.py [--positional]")
     build_secondary_index()
\ No newline at end of file
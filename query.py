@@ -1,5 +1,9 @@
 import pickle
-from A3_index import InvertedIndex, Posting
+import heapq
+import mmap
+import warnings
+from typing import Union
+from A3_index import InvertedIndex, Posting, read_term_positions
 import re
 from nltk.stem.porter import PorterStemmer
 STOPWORDS = {
@@ -30,6 +34,8 @@ def load_index(index_path='index.pkl') -> InvertedIndex:
     """
 
 stemmer = PorterStemmer()
+MAX_WINDOW = 10  # query terms spread over more tokens than this get no proximity boost
+PROXIMITY_BOOST = 3  # the tightest window lifts a doc at most this many places within its importance tier
 
 def load_lexicon(lexicon_path='lexicon.pkl'):
     # Load index of index
@@ -37,18 +43,73 @@ def load_lexicon(lexicon_path='lexicon.pkl'):
         lexicon, doc_id_map = pickle.load(f)
     return lexicon, doc_id_map
 
+IndexSource = Union[str, mmap.mmap]  # a file path, or a buffer from map_index_file
+
+def map_index_file(path: str) -> mmap.mmap:
+    # read-only mapping of postings.dat / positions.dat; pages are shared by every process that inherits it
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def read_blob(source: IndexSource, offset: int, length: int) -> bytes:
+    # source is either a file path or a buffer from map_index_file
+    if isinstance(source, str):
+        with open(source, 'rb') as pf:
+            pf.seek(offset)
+            return pf.read(length)
+    return source[offset:offset + length]
+
 def fetch_postings(term: str,
                    lexicon: dict,
-                   postings_path='postings.dat') -> list:
+                   postings_path: IndexSource = 'postings.dat') -> list:
     if term not in lexicon:
         return []
-    offset, length = lexicon[term]
+    offset, length = lexicon[term][:2]
 
-    with open(postings_path, 'rb') as pf:
-        pf.seek(offset)
-        blob = pf.read(length) # now holding the post we wanna search
+    blob = read_blob(postings_path, offset, length) # now holding the post we wanna search
     return pickle.loads(blob)
 
+def fetch_positions(term: str,
+                    lexicon: dict,
+                    doc_ids: list,
+                    positions_path: IndexSource = 'positions.dat') -> dict:
+    # {doc_id: positions} for just doc_ids; only positional lexicons carry (pos_offset, pos_length)
+    if term not in lexicon or len(lexicon[term]) < 4:
+        return {}
+    pos_offset, pos_length = lexicon[term][2:4]
+
+    if not isinstance(positions_path, str):
+        return read_term_positions(positions_path, pos_offset, pos_length, doc_ids)
+    with map_index_file(positions_path) as buf:
+        return read_term_positions(buf, pos_offset, pos_length, doc_ids)
+
+def parse_phrase(phrase: str) -> list:
+    # [(offset, stem)] using the indexer's token rules, so offsets line up with indexed positions
+    # even when stopwords / digits inside the phrase are dropped
+    raw_tokens = re.findall(r"[a-z0-9\+#]{2,}", phrase.lower())
+    return [(i, stemmer.stem(tok)) for i, tok in enumerate(raw_tokens)
+            if not tok.isdigit() and tok not in STOPWORDS]
+
+def phrase_match(position_lists: list, offsets: list) -> bool:
+    # true if some position p of the first term has every other term at p + (its offset - first offset)
+    base = offsets[0]
+    others = [(set(pl), off - base) for pl, off in zip(position_lists[1:], offsets[1:])]
+    return any(all(p + d in s for s, d in others) for p in position_lists[0])
+
+def min_window(position_lists: list) -> int:
+    # smallest span of tokens containing at least one position from every list
+    heap = [(pl[0], i, 0) for i, pl in enumerate(position_lists)]
+    heapq.heapify(heap)
+    hi = max(pos for pos, _, _ in heap)
+    best = hi - heap[0][0] + 1
+    while True:
+        lo, i, j = heapq.heappop(heap)
+        best = min(best, hi - lo + 1)
+        if j + 1 == len(position_lists[i]):
+            return best
+        nxt = position_lists[i][j + 1]
+        hi = max(hi, nxt)
+        heapq.heappush(heap, (nxt, i, j + 1))
+
 
 
 # def stem(word: str) -> str:
@@ -86,20 +147,26 @@ def fetch_postings(term: str,
 def simple_search(query: str,
                   lexicon: dict,
                   doc_id_map: dict,
-                  postings_path: str = 'postings.dat',
-                  top_k: int = 5) -> list[str]:
+                  postings_path: IndexSource = 'postings.dat',
+                  top_k: int = 5,
+                  positions_path: IndexSource = 'positions.dat') -> list[str]:
 
     # tokenize and stem
     # tokens = [stem(tok) for tok in query.lower().split()]
     # if not tokens:
     #     return []
 
+    # Quoted phrases must match exactly on a positional index (otherwise they are a plain AND
+    # of their terms, with a warning); their terms are also ANDed
+    phrases = [ph for ph in (parse_phrase(p) for p in re.findall(r'"([^"]*)"', query)) if ph]
+    loose = re.sub(r'"[^"]*"', ' ', query)
+
     # Extract only alphanumeric tokens (lowercased)
-    raw_tokens = re.findall(r"[a-z0-9]+", query.lower())
+    raw_tokens = re.findall(r"[a-z0-9]+", loose.lower())
     # Remove pure‐digit tokens and common stopwords
     filtered = [tok for tok in raw_tokens if not tok.isdigit() and tok not in STOPWORDS]
     # Stem
-    tokens = [stemmer.stem(tok) for tok in filtered]
+    tokens = [stemmer.stem(tok) for tok in filtered] + [tok for ph in phrases for _, tok in ph]
 
     # get each term’s postings from postings.dat
     postings_lists = [fetch_postings(tok, lexicon, postings_path)
@@ -117,13 +184,40 @@ def simple_search(query: str,
         return []
 
     # rank
-    results = []
-    for p in postings_lists[0]:
-        if p.doc_id in common:
-            results.append(doc_id_map[p.doc_id])
-            if len(results) >= top_k:
-                break
-    return results
+    candidates = [(p.importance, p.doc_id) for p in postings_lists[0] if p.doc_id in common]
+    terms = set(tokens)
+    positional = all(len(lexicon[tok]) >= 4 for tok in terms)
+    if phrases and not positional:
+        warnings.warn("index was built without --positional; quoted phrases are matched as a plain AND",
+                      stacklevel=2)
+    # a lone term (even quoted) has nothing to be near, so skip the positions entirely
+    if not positional or (len(terms) == 1 and all(len(ph) == 1 for ph in phrases)):
+        return [doc_id_map[doc_id] for _, doc_id in candidates[:top_k]]
+
+    # postings order stays the ranking; a tight window only moves a doc up to PROXIMITY_BOOST
+    # places within its importance tier. candidates are decoded a batch at a time and we stop
+    # once no later candidate could still reach the top_k
+    batch_size = top_k + PROXIMITY_BOOST
+    scored = []
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start:start + batch_size]
+        doc_ids = [doc_id for _, doc_id in batch]
+        term_positions = {tok: fetch_positions(tok, lexicon, doc_ids, positions_path) for tok in terms}
+        for rank, (importance, doc_id) in enumerate(batch, start):
+            doc_positions = {tok: term_positions[tok][doc_id] for tok in terms}
+            if not all(phrase_match([doc_positions[tok] for _, tok in ph], [off for off, _ in ph])
+                       for ph in phrases):
+                continue
+            window = min_window(list(doc_positions.values()))
+            boost = PROXIMITY_BOOST * max(0, MAX_WINDOW + 1 - window) / MAX_WINDOW
+            scored.append((importance, rank - boost, doc_id))
+        scored.sort()
+
+        following = start + batch_size
+        if len(scored) >= top_k and following < len(candidates) and \
+                scored[top_k - 1][:2] < (candidates[following][0], following - PROXIMITY_BOOST):
+            break
+    return [doc_id_map[doc_id] for _, _, doc_id in scored[:top_k]]
 
 if __name__ == '__main__':
     lexicon, doc_id_map = load_lexicon('lexicon.pkl')
@@ -1,29 +1,29 @@
 from A3_index import Posting 
-import pickle
+from query import load_lexicon, fetch_postings
 
-def print_index(index):
+def print_index(lexicon, postings_path):
     """
     Prints the inverted index with tokens and their postings.
     """
-    for token, postings in index.items():
-        print(f"{token}: {postings}")
+    for token in lexicon:
+        print(f"{token}: {fetch_postings(token, lexicon, postings_path)}")
 
 if __name__ == "__main__":
-    # Path to the serialized index file
-    index_file_path = "/Users/joehoshina/Information-Retrieval/Assignment3/121_A3/index.pkl"
+    # Paths to the lexicon and postings written by build_index.py
+    lexicon_path = "/Users/joehoshina/Information-Retrieval/Assignment3/121_A3/lexicon.pkl"
+    postings_path = "/Users/joehoshina/Information-Retrieval/Assignment3/121_A3/postings.dat"
 
-    # Load the index and document map from index.pkl
+    # Load the lexicon and document map from lexicon.pkl
     try:
-        with open(index_file_path, "rb") as f:
-            index, doc_id_map = pickle.load(f)
+        lexicon, doc_id_map = load_lexicon(lexicon_path)
 
-        print(f"Loaded index with {len(index)} tokens.")
+        print(f"Loaded index with {len(lexicon)} tokens.")
         print(f"Loaded document map with {len(doc_id_map)} documents.")
 
         # Print the inverted index
-        print_index(index)
+        print_index(lexicon, postings_path)
 
-    except FileNotFoundError:
-        print(f"Error: File '{index_file_path}' not found.")
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found.")
     except Exception as e:
         print(f"Error loading index: {e}")
\ No newline at end of file
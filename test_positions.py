@@ -0,0 +1,100 @@
+import os
+import tempfile
+from A3_index import (InvertedIndex, POSITIONS_SKIP, encode_positions, decode_positions,
+                      pack_term_positions, read_term_positions)
+from query import load_lexicon, parse_phrase, phrase_match, min_window, simple_search
+
+# Self-checks for the positional index; run with `python test_positions.py` (or pytest)
+
+
+def build_block(num_docs: int, step: int = 3):
+    """
+    Positional index over num_docs docs where only every step-th doc contains "alpha",
+    returns (packed "alpha" block, {doc_id: positions of alpha}).
+    """
+    index = InvertedIndex(positional=True)
+    expected = {}
+    for doc_id in range(num_docs):
+        if doc_id % step == 0:
+            words = ["filler"] * (doc_id % 5) + ["alpha", "filler", "alpha"] + ["filler"] * 200 + ["alpha"]
+            expected[doc_id] = [i for i, w in enumerate(words) if w == "alpha"]
+        else:
+            words = ["filler", "other"]
+        index.add_document(" ".join(words), f"http://d{doc_id}")
+    num_postings = len(index.index["alpha"])
+    return pack_term_positions(index.positions["alpha"], num_postings), expected
+
+
+def test_varint_round_trip():
+    for positions in ([], [0], [0, 1, 2], [5, 127, 128, 255, 256], [3, 200, 20000, 3000000]):
+        assert decode_positions(encode_positions(positions)) == positions
+    # gaps of 127 fit one byte, 128 needs two
+    assert len(encode_positions([127])) == 1
+    assert len(encode_positions([128])) == 2
+
+
+def test_read_term_positions():
+    num_docs = POSITIONS_SKIP * 3 * 3 + 7  # several skip groups, last one partial
+    block, expected = build_block(num_docs)
+    buf = b"junk" + block + b"more junk"
+    offset, length = 4, len(block)
+
+    # first doc, a missing doc, a doc past the first skip and the last doc, in any order
+    last = max(expected)
+    wanted = [last, 1, 0, POSITIONS_SKIP * 3 + 3]
+    got = read_term_positions(buf, offset, length, wanted)
+    assert got == {doc_id: expected[doc_id] for doc_id in wanted if doc_id in expected}
+    assert 1 not in got
+
+    # every doc at once, plus ids past the end
+    assert read_term_positions(buf, offset, length, list(range(num_docs + 5))) == expected
+
+    # a length that cuts the block short is reported, not read past
+    try:
+        read_term_positions(buf, offset, length - 3, [last])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("truncated block was not detected")
+
+
+def test_phrase_offsets_across_stopwords():
+    phrase = parse_phrase("University of California")
+    assert [off for off, _ in phrase] == [0, 2]
+    assert [tok for _, tok in phrase] == ["univers", "california"]
+
+    offsets = [off for off, _ in phrase]
+    # "university of california" at 4..6, "university california" (no gap) at 10..11
+    assert phrase_match([[4, 10], [6, 11]], offsets)
+    assert not phrase_match([[10], [11]], offsets)
+
+
+def test_min_window_unequal_lengths():
+    assert min_window([[1, 50, 100], [52]]) == 3
+    assert min_window([[0, 4, 9], [3], [10, 20, 30, 40]]) == 8
+    assert min_window([[7]]) == 1
+
+
+def test_search_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        lexicon_path, postings_path, positions_path = (os.path.join(tmp, name)
+                                                       for name in ("lexicon.pkl", "postings.dat", "positions.dat"))
+        index = InvertedIndex(positional=True)
+        index.add_document("machine learning is fun " * 3, "http://a")
+        index.add_document("learning about a machine and more", "http://b")
+        index.add_document("the university of california irvine", "http://c")
+        index.write_index(lexicon_path, postings_path, positions_path)
+
+        lexicon, doc_id_map = load_lexicon(lexicon_path)
+        search = lambda q: simple_search(q, lexicon, doc_id_map, postings_path, positions_path=positions_path)
+        assert search('"machine learning"') == ["http://a"]
+        assert search('"university of california"') == ["http://c"]
+        assert search('"california university"') == []
+        assert sorted(search("machine learning")) == ["http://a", "http://b"]
+
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_") and callable(check):
+            check()
+            print(f"ok  {name}")